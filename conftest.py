@@ -0,0 +1,47 @@
+# Présent à la racine pour que pytest ajoute le projet au sys.path (import de treatement)
+import random
+import struct
+
+import pytest
+
+
+@pytest.fixture
+def message_file(tmp_path):
+    # Fichier de bits '0'/'1' (4 par ligne) de nbytes octets, le dernier incomplet pour tester le padding
+    def write(nbytes, seed=0, name='message.txt'):
+        rng = random.Random(seed)
+        bits = ''.join(rng.choice('01') for _ in range(max(nbytes * 8 - 3, 0)))
+        path = tmp_path / name
+        with open(path, 'w') as f:
+            for i in range(0, len(bits), 4):
+                f.write(bits[i:i + 4] + '\n')
+        return str(path), bits
+
+    return write
+
+
+@pytest.fixture
+def make_wav(tmp_path):
+    # Fichier WAV synthétique à échantillons aléatoires ; extensible : en-tête WAVE_FORMAT_EXTENSIBLE,
+    # suivi d'un bloc LIST à ignorer avant les données
+    def write(name, nchannels=1, sampwidth=2, nframes=4000, format_tag=1, extensible=False, seed=0):
+        rng = random.Random(seed)
+        data = bytes(rng.randrange(256) for _ in range(nchannels * sampwidth * nframes))
+        bits = sampwidth * 8
+        block_align = nchannels * sampwidth
+        if extensible:
+            subformat = struct.pack('<H', format_tag) + b'\x00\x00\x00\x00\x10\x00\x80\x00\x00\xaa\x00\x38\x9b\x71'
+            fmt = struct.pack('<HHIIHHHHI16s', 0xFFFE, nchannels, 44100, 44100 * block_align, block_align, bits,
+                              22, bits, 0, subformat)
+        else:
+            fmt = struct.pack('<HHIIHH', format_tag, nchannels, 44100, 44100 * block_align, block_align, bits)
+
+        chunks = b'fmt ' + struct.pack('<I', len(fmt)) + fmt
+        chunks += b'LIST' + struct.pack('<I', 3) + b'abc\x00'
+        chunks += b'data' + struct.pack('<I', len(data)) + data
+        path = tmp_path / name
+        with open(path, 'wb') as f:
+            f.write(b'RIFF' + struct.pack('<I', 4 + len(chunks)) + b'WAVE' + chunks)
+        return str(path), data
+
+    return write
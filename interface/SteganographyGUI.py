@@ -3,6 +3,7 @@ import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
 from tkinter import filedialog, messagebox
 from treatement.ImageTreat import ImageSteganography
+from treatement.JpegTreat import JpegSteganography
 from treatement.AudioTreat import AudioSteganography
 from treatement.HuffmanTreat import Huffman
 import os
@@ -104,6 +105,13 @@ class SteganoGUI:
         if path:
             self.audio_path.set(path)
 
+    @staticmethod
+    def is_jpeg(path):
+        return os.path.splitext(path)[1].lower() in ('.jpg', '.jpeg')
+
+    def image_engine(self, path):
+        return JpegSteganography(path) if self.is_jpeg(path) else ImageSteganography(path)
+
     def hide_image_message(self):
         try:
             if not self.image_path.get():
@@ -113,17 +121,24 @@ class SteganoGUI:
             if not message_path:
                 return
 
+            # Les JPEG sont traités dans le domaine DCT et restent des JPEG
+            if self.is_jpeg(self.image_path.get()):
+                extension, filetypes = ".jpg", [("JPEG files", "*.jpg *.jpeg")]
+            else:
+                extension, filetypes = ".png", [("PNG files", "*.png")]
+
             output_path = filedialog.asksaveasfilename(
                 title="Save output image",
-                defaultextension=".png",
-                filetypes=[("PNG files", "*.png")]
+                defaultextension=extension,
+                filetypes=filetypes
             )
 
-            stego = ImageSteganography(self.image_path.get())
+            stego = self.image_engine(self.image_path.get())
             stego.hide_binary_file(
                 message_path,
                 output_path,
-                positions_file=self.positions_file.get()
+                positions_file=self.positions_file.get(),
+                compression='auto'
             )
             messagebox.showinfo("Success", "Message hidden successfully!")
         except Exception as e:
@@ -136,7 +151,7 @@ class SteganoGUI:
             if not self.huffman_dict:
                 raise ValueError("Please load Huffman dictionary first")
 
-            stego = ImageSteganography(self.image_path.get())
+            stego = self.image_engine(self.image_path.get())
             recovered_bits = stego.retrieve_binary_file(
                 output_txt_path=None,
                 positions_file=self.positions_file.get()
@@ -166,7 +181,8 @@ class SteganoGUI:
             stego.hide_binary_file(
                 message_path,
                 output_path,
-                positions_file=self.positions_file.get()
+                positions_file=self.positions_file.get(),
+                compression='auto'
             )
             messagebox.showinfo("Success", "Message hidden successfully!")
         except Exception as e:
@@ -0,0 +1,120 @@
+import os
+import struct
+from collections import Counter
+
+import pytest
+
+from treatement.AudioTreat import AudioSteganography
+
+TEST_DIR = os.path.dirname(__file__)
+INPUT_WAV = os.path.join(TEST_DIR, 'input.wav')
+
+
+@pytest.mark.parametrize('nbytes', [1, 300, 800])
+def test_hide_retrieve_round_trip(tmp_path, message_file, nbytes):
+    message, bits = message_file(nbytes)
+    output = str(tmp_path / 'output.wav')
+    positions = str(tmp_path / 'positions.txt')
+
+    AudioSteganography(INPUT_WAV).hide_binary_file(message, output, positions)
+
+    assert AudioSteganography(output).retrieve_binary_file(positions_file=positions) == bits
+    assert AudioSteganography(output).retrieve_binary_file() == bits
+
+
+def test_capacity_uses_disjoint_slots():
+    stego = AudioSteganography(INPUT_WAV)
+    capacity = AudioSteganography.analyze(INPUT_WAV)['capacity'][0]
+
+    slots = (stego.total_samples - stego.metadata_samples) // 8
+    assert capacity == {'random': min(slots, AudioSteganography.max_payload)}
+
+
+def test_payload_larger_than_capacity_is_rejected(tmp_path, message_file):
+    capacity = AudioSteganography.analyze(INPUT_WAV)['capacity'][0]['random']
+    message, _ = message_file(capacity + 2)
+
+    with pytest.raises(ValueError, match="Capacité insuffisante"):
+        AudioSteganography(INPUT_WAV).hide_binary_file(message, str(tmp_path / 'out.wav'))
+
+
+def test_retrieve_legacy_carrier():
+    # output.wav a été écrit avec l'en-tête 32 bits d'origine (version 0)
+    with open(os.path.join(TEST_DIR, 'hideMessage2.txt')) as f:
+        bits = ''.join(line.strip() for line in f)
+
+    assert AudioSteganography(os.path.join(TEST_DIR, 'output.wav')).retrieve_binary_file() == bits
+
+
+def test_wrong_channel_selection_is_rejected(tmp_path, make_wav, message_file):
+    carrier, _ = make_wav('stereo.wav', nchannels=2)
+    message, _ = message_file(100)
+    output = str(tmp_path / 'output.wav')
+    AudioSteganography(carrier).hide_binary_file(message, output, compression='auto')
+
+    with pytest.raises(ValueError, match="Signature absente|Somme de contrôle invalide"):
+        AudioSteganography(output, [0]).retrieve_binary_file()
+
+
+def test_wrong_positions_file_fails_checksum(tmp_path, message_file):
+    message, _ = message_file(200)
+    output = str(tmp_path / 'output.wav')
+    AudioSteganography(INPUT_WAV).hide_binary_file(message, output, str(tmp_path / 'positions.txt'))
+
+    with open(tmp_path / 'wrong.txt', 'w') as f:
+        f.write('\n'.join(str(AudioSteganography.metadata_samples + 8 * i) for i in range(200)))
+
+    with pytest.raises(ValueError, match="Somme de contrôle invalide"):
+        AudioSteganography(output).retrieve_binary_file(positions_file=str(tmp_path / 'wrong.txt'))
+
+
+def test_float_carrier_limited_to_mantissa_bits(tmp_path, make_wav, message_file):
+    carrier, _ = make_wav('float.wav', sampwidth=4, format_tag=3)
+    message, _ = message_file(10)
+
+    assert sorted(AudioSteganography.analyze(carrier)['capacity']) == list(range(23))
+    with pytest.raises(ValueError, match="Shift invalide"):
+        AudioSteganography(carrier).hide_binary_file(message, str(tmp_path / 'out.wav'), shift=23)
+
+
+@pytest.mark.parametrize('sampwidth, format_tag, extensible, channels', [
+    (1, 1, False, None),
+    (3, 1, False, None),
+    (3, 1, True, [1, 2]),
+    (4, 1, False, [0]),
+    (4, 3, False, None),
+    (4, 3, True, [2]),
+])
+def test_synthetic_wav_round_trip(tmp_path, make_wav, message_file, sampwidth, format_tag, extensible, channels):
+    nchannels = 3
+    carrier, data = make_wav('input.wav', nchannels, sampwidth, format_tag=format_tag, extensible=extensible)
+    message, bits = message_file(300)
+    output = str(tmp_path / 'output.wav')
+
+    for shift in (0, min(sampwidth * 8 - 1, 22)):
+        AudioSteganography(carrier, channels).hide_binary_file(message, output, shift=shift, compression='auto')
+        assert AudioSteganography(output, channels).retrieve_binary_file() == bits
+
+        with open(carrier, 'rb') as f_in, open(output, 'rb') as f_out:
+            original, written = f_in.read(), f_out.read()
+        # Seuls les octets d'échantillons changent, et uniquement sur les canaux choisis
+        assert len(written) == len(original) and written[:-len(data)] == original[:-len(data)]
+        stego_data = written[-len(data):]
+        for channel in set(range(nchannels)) - set(channels or range(nchannels)):
+            for frame in range(len(data) // (nchannels * sampwidth)):
+                start = (frame * nchannels + channel) * sampwidth
+                assert stego_data[start:start + sampwidth] == data[start:start + sampwidth]
+
+
+def test_24bit_histogram_matches_struct_unpack(make_wav):
+    nchannels = 2
+    carrier, data = make_wav('pcm24.wav', nchannels, sampwidth=3)
+    stego = AudioSteganography(carrier)
+
+    for channel in range(nchannels):
+        expected = Counter()
+        for start in range(channel * 3, len(data), nchannels * 3):
+            # Extension de signe du 24 bits par l'octet de poids fort
+            (value,) = struct.unpack('<i', data[start:start + 3] + (b'\xff' if data[start + 2] & 0x80 else b'\x00'))
+            expected[value] += 1
+        assert stego._channel_histogram(channel) == expected
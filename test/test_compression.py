@@ -0,0 +1,33 @@
+import random
+
+import pytest
+
+from treatement.CompressionTreat import CODECS, codec_id_from_name, compress_payload, decompress_payload
+
+rng = random.Random(0)
+SAMPLES = [
+    b'',
+    b'a',
+    b'aaaa' * 100,
+    bytes(range(256)),
+    bytes(rng.choice(b'0123') for _ in range(5000)),
+    bytes(rng.randrange(256) for _ in range(3000)),
+]
+
+
+@pytest.mark.parametrize('data', SAMPLES)
+@pytest.mark.parametrize('compression', [None, 'auto'] + [name for name, _, _ in CODECS.values()])
+def test_round_trip(data, compression):
+    codec_id, compressed = compress_payload(data, compression)
+    assert decompress_payload(codec_id, compressed) == data
+
+
+def test_huffman_table_overhead_is_bounded():
+    # Longueurs canoniques : au plus 256 octets de table quel que soit l'alphabet
+    data = bytes(range(256))
+    assert len(compress_payload(data, 'huffman')[1]) <= len(data) + 258
+
+
+def test_auto_picks_huffman_on_small_alphabet():
+    data = SAMPLES[4]
+    assert compress_payload(data, 'auto')[0] == codec_id_from_name('huffman')
@@ -0,0 +1,94 @@
+import os
+
+import pytest
+
+pytest.importorskip('PIL')
+
+from treatement.AnalysisTreat import select_carrier
+from treatement.HeaderTreat import HEADER_BITS
+from treatement.ImageTreat import ImageSteganography
+from treatement.JpegTreat import JpegSteganography
+
+TEST_DIR = os.path.dirname(__file__)
+INPUT_PNG = os.path.join(TEST_DIR, 'hide.png')
+SMALL_JPG = os.path.join(TEST_DIR, 'small.jpg')
+
+
+@pytest.mark.parametrize('compression', [None, 'auto'])
+def test_hide_retrieve_round_trip(tmp_path, message_file, compression):
+    message, bits = message_file(500)
+    output = str(tmp_path / 'output.png')
+    positions = str(tmp_path / 'positions.txt')
+
+    ImageSteganography(INPUT_PNG).hide_binary_file(message, output, positions, compression=compression)
+
+    assert ImageSteganography(output).retrieve_binary_file(positions_file=positions) == bits
+    assert ImageSteganography(output).retrieve_binary_file() == bits
+
+
+def test_positions_do_not_overlap_header(tmp_path, message_file):
+    message, _ = message_file(500)
+    positions = str(tmp_path / 'positions.txt')
+
+    ImageSteganography(INPUT_PNG).hide_binary_file(message, str(tmp_path / 'output.png'), positions)
+
+    with open(positions) as f:
+        assert min(int(line) for line in f if line.strip()) >= HEADER_BITS
+
+
+def test_wrong_positions_file_fails_checksum(tmp_path, message_file):
+    message, _ = message_file(50)
+    output = str(tmp_path / 'output.png')
+    ImageSteganography(INPUT_PNG).hide_binary_file(message, output)
+
+    wrong_positions = tmp_path / 'wrong.txt'
+    wrong_positions.write_text(''.join(f"{HEADER_BITS + i}\n" for i in range(50 * 8)))
+
+    with pytest.raises(ValueError, match="Somme de contrôle invalide"):
+        ImageSteganography(output).retrieve_binary_file(positions_file=str(wrong_positions))
+
+
+def test_legacy_carrier_is_read_as_version_0(tmp_path, message_file):
+    # Porteur écrit comme avant l'en-tête versionné : mot de métadonnées seul dans les 32 premiers
+    # LSB, positions tirées sur tout le porteur
+    message, bits = message_file(40)
+    stego = ImageSteganography(INPUT_PNG)
+    payload = stego._bits_to_bytes(bits)
+    padding = (8 - len(bits) % 8) % 8
+
+    pixels = [list(pixel) for pixel in stego.pixels]
+
+    def set_lsb(pos, bit):
+        pixel = pixels[pos // 3]
+        pixel[pos % 3] = (pixel[pos % 3] & 0xFE) | bit
+
+    for i, bit in enumerate(format(len(payload) | (padding << 24), '032b')):
+        set_lsb(i, int(bit))
+    stego._load_or_generate_positions(None, 8 * len(payload), first_pos=0)
+    for i, byte in enumerate(payload):
+        for bit_pos in range(8):
+            set_lsb(stego.byte_positions[i * 8 + bit_pos], (byte >> (7 - bit_pos)) & 1)
+
+    output = str(tmp_path / 'legacy.png')
+    stego._save_image([tuple(pixel) for pixel in pixels], output)
+
+    assert ImageSteganography(output).retrieve_binary_file() == bits
+
+
+def test_analyze_reports_capacity_and_statistics():
+    report = ImageSteganography.analyze(INPUT_PNG, statistics=True)
+    pixels = report['width'] * report['height']
+
+    assert report['capacity'][0] == {'random': min((pixels * 3 - HEADER_BITS) // 8, ImageSteganography.max_payload)}
+    assert set(report['statistics']) == {0, 1, 2}
+    for stat in report['statistics'].values():
+        assert 0.0 <= stat['embedding_probability'] <= 1.0
+
+
+def test_select_carrier_skips_too_small_carriers():
+    jpeg_capacity = JpegSteganography.analyze(SMALL_JPG)['capacity'][0]['random']
+    png_capacity = ImageSteganography.analyze(INPUT_PNG)['capacity'][0]['random']
+    assert png_capacity > jpeg_capacity
+
+    assert select_carrier([SMALL_JPG, INPUT_PNG], jpeg_capacity + 1) == INPUT_PNG
+    assert select_carrier([SMALL_JPG, INPUT_PNG], png_capacity + 1) is None
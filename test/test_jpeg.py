@@ -0,0 +1,55 @@
+import os
+import pytest
+
+from treatement.JpegTreat import JpegSteganography
+
+TEST_DIR = os.path.dirname(__file__)
+INPUT_JPG = os.path.join(TEST_DIR, 'hide.jpg')
+SMALL_JPG = os.path.join(TEST_DIR, 'small.jpg')
+
+
+def test_save_without_message_is_identical(tmp_path):
+    output = str(tmp_path / 'copy.jpg')
+    JpegSteganography(INPUT_JPG)._save_image(output)
+
+    with open(INPUT_JPG, 'rb') as original, open(output, 'rb') as copy:
+        assert copy.read() == original.read()
+
+
+@pytest.mark.parametrize('compression', [None, 'auto'])
+def test_hide_retrieve_round_trip_at_full_capacity(tmp_path, message_file, compression):
+    capacity = JpegSteganography.analyze(INPUT_JPG)['capacity'][0]['random']
+    message, bits = message_file(capacity)
+    output = str(tmp_path / 'output.jpg')
+    positions = str(tmp_path / 'positions.txt')
+
+    JpegSteganography(INPUT_JPG).hide_binary_file(message, output, positions, compression=compression)
+
+    stego = JpegSteganography(output)
+    assert stego.retrieve_binary_file(positions_file=positions) == bits
+    # Mêmes coefficients utilisables : seuls les LSB des amplitudes ont changé
+    assert stego.coefficient_signs == JpegSteganography(INPUT_JPG).coefficient_signs
+
+
+def test_carrier_without_message_is_rejected():
+    with pytest.raises(ValueError, match="Signature absente"):
+        JpegSteganography(INPUT_JPG).retrieve_binary_file()
+
+
+def test_too_few_coefficients_for_header(tmp_path, message_file):
+    message, _ = message_file(0)
+
+    with pytest.raises(ValueError, match="Capacité insuffisante"):
+        JpegSteganography(SMALL_JPG).hide_binary_file(message, str(tmp_path / 'out.jpg'))
+
+
+def test_missing_huffman_table_is_rejected(tmp_path):
+    # Suppression du segment DHT, comme les flux Motion-JPEG qui comptent sur les tables par défaut
+    with open(INPUT_JPG, 'rb') as f:
+        data = f.read()
+    start = data.index(b'\xff\xc4')
+    length = int.from_bytes(data[start + 2:start + 4], 'big')
+    (tmp_path / 'nodht.jpg').write_bytes(data[:start] + data[start + 2 + length:])
+
+    with pytest.raises(ValueError, match="Table de Huffman"):
+        JpegSteganography(str(tmp_path / 'nodht.jpg'))
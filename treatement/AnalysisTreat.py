@@ -0,0 +1,72 @@
+import math
+import os
+
+
+def lsb_chi_square(histogram):
+    # Test du chi-deux sur les paires de valeurs (2k, 2k+1) : un remplissage LSB
+    # tend à égaliser les deux effectifs de chaque paire.
+    pairs = {}
+    ones = 0
+    total = 0
+    for value, count in histogram.items():
+        if count <= 0:
+            continue
+        pair = pairs.setdefault(value >> 1, [0, 0])
+        pair[value & 1] += count
+        ones += count if value & 1 else 0
+        total += count
+
+    chi_square = 0.0
+    degrees = -1
+    for even, odd in pairs.values():
+        expected = (even + odd) / 2
+        chi_square += (even - expected) ** 2 / expected
+        degrees += 1
+
+    return {
+        'chi_square': chi_square,
+        'degrees_of_freedom': max(degrees, 0),
+        'embedding_probability': _chi_square_survival(chi_square, degrees),
+        'lsb_ones_ratio': ones / total if total else 0.0,
+    }
+
+
+def _chi_square_survival(chi_square, degrees):
+    if degrees <= 0:
+        return 1.0
+    # Approximation de Wilson-Hilferty de P(X >= chi_square)
+    variance = 2 / (9 * degrees)
+    z = ((chi_square / degrees) ** (1 / 3) - (1 - variance)) / math.sqrt(variance)
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def select_carrier(carrier_paths, payload_size, shift=0, scheme='random'):
+    # Import local : les moteurs importent eux-mêmes ce module
+    from treatement.AudioTreat import AudioSteganography
+    from treatement.ImageTreat import ImageSteganography
+    from treatement.JpegTreat import JpegSteganography
+    engines = {'.wav': AudioSteganography, '.jpg': JpegSteganography, '.jpeg': JpegSteganography}
+
+    # Premier passage sur les en-têtes seuls, puis statistiques LSB uniquement pour les porteurs
+    # assez grands. Les moteurs qui doivent de toute façon lire les données (JPEG) calculent leurs
+    # statistiques dès le premier passage pour ne lire le fichier qu'une fois.
+    candidates = []
+    for path in carrier_paths:
+        engine = engines.get(os.path.splitext(path)[1].lower(), ImageSteganography)
+        report = engine.analyze(path, statistics=not engine.header_only_analysis)
+        capacity = report['capacity'].get(shift, {}).get(scheme, 0)
+        if capacity >= payload_size:
+            candidates.append((engine, path, report))
+
+    best_path = None
+    best_probability = None
+    for engine, path, report in candidates:
+        if 'statistics' not in report:
+            report = engine.analyze(path, statistics=True)
+        statistics = report['statistics']
+        probability = max(stat['embedding_probability'] for stat in statistics.values())
+        if best_probability is None or probability < best_probability:
+            best_path = path
+            best_probability = probability
+
+    return best_path
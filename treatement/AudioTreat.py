@@ -1,42 +1,207 @@
-import wave
 import struct
+import sys
 import os
 import random
+from array import array
+from collections import Counter
+
+from treatement.AnalysisTreat import lsb_chi_square
+from treatement.CompressionTreat import compress_payload, decompress_payload
+from treatement.HeaderTreat import HEADER_BITS, LEGACY_VERSION, pack_header, payload_checksum, unpack_header
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+FLOAT_MANTISSA_BITS = 23  # Au-delà : exposant et signe des flottants 32 bits
 
 
 class AudioSteganography:
-    def __init__(self, audio_path):
+    max_payload = 0xFFFF  # La longueur est stockée sur 16 bits
+    metadata_samples = HEADER_BITS  # Un bit d'en-tête par échantillon
+    header_only_analysis = True  # analyze() sans statistiques ne lit que l'en-tête WAV
+
+    def __init__(self, audio_path, channels=None):
         if not os.path.exists(audio_path):
             raise FileNotFoundError(f"Le fichier audio {audio_path} n'existe pas")
 
         self.audio_path = audio_path
-        self.wave_read = wave.open(audio_path, 'rb')
-        self.nchannels = self.wave_read.getnchannels()
-        self.sampwidth = self.wave_read.getsampwidth()
-        self.framerate = self.wave_read.getframerate()
-        self.nframes = self.wave_read.getnframes()
-        self.comptype = self.wave_read.getcomptype()
-        self.compname = self.wave_read.getcompname()
-
-        self.frames = self.wave_read.readframes(self.nframes)
-        self.wave_read.close()
-
-        total_samples = self.nframes * self.nchannels
-        if self.sampwidth == 1:
-            fmt = f"{total_samples}B"
-        elif self.sampwidth == 2:
-            fmt = f"<{total_samples}h"
-        else:
-            raise ValueError("Seuls les fichiers 8-bit ou 16-bit sont supportés")
-
-        self.samples = list(struct.unpack(fmt, self.frames))
-        self.metadata_samples = 32  # Pour stocker longueur et shift
+        with open(audio_path, 'rb') as f:
+            wav_format = self._read_wav_format(f)
+            f.seek(0)
+            # Le fichier entier est conservé : seuls les octets d'échantillons seront modifiés
+            self.raw = bytearray(f.read())
+
+        self.format_tag = wav_format['format_tag']
+        self.nchannels = wav_format['nchannels']
+        self.sampwidth = wav_format['sampwidth']
+        self.framerate = wav_format['framerate']
+        self.block_align = wav_format['block_align']
+        self.nframes = wav_format['nframes']
+        self.frames = memoryview(self.raw)[wav_format['data_offset']:
+                                           wav_format['data_offset'] + self.nframes * self.block_align]
+
+        self.channels = self._validate_channels(channels, self.nchannels)
+        self.total_samples = self.nframes * len(self.channels)
+        self._planes = {}
         self.byte_positions = []
 
-    def hide_binary_file(self, txt_path, output_audio_path, positions_file=None, shift=0):
+    @classmethod
+    def analyze(cls, audio_path, statistics=False, channels=None):
+        if not os.path.exists(audio_path):
+            raise FileNotFoundError(f"Le fichier audio {audio_path} n'existe pas")
+
+        # Seul l'en-tête WAV est lu, sauf si les statistiques sont demandées
+        with open(audio_path, 'rb') as f:
+            wav_format = cls._read_wav_format(f)
+
+        channels = cls._validate_channels(channels, wav_format['nchannels'])
+        total_samples = wav_format['nframes'] * len(channels)
+        report = {
+            'channels': wav_format['nchannels'],
+            'bit_depth': wav_format['sampwidth'] * 8,
+            'samples': total_samples,
+            'capacity': {
+                shift: cls._capacity(total_samples)
+                for shift in range(cls._max_shift(wav_format['format_tag'], wav_format['sampwidth']))
+            },
+        }
+
+        if statistics:
+            stego = cls(audio_path, channels)
+            report['statistics'] = {
+                channel: lsb_chi_square(stego._channel_histogram(channel)) for channel in channels
+            }
+
+        return report
+
+    @classmethod
+    def _capacity(cls, total_samples):
+        # Un créneau de 8 échantillons consécutifs par octet, après l'en-tête
+        return {'random': min(max(total_samples - cls.metadata_samples, 0) // 8, cls.max_payload)}
+
+    @staticmethod
+    def _max_shift(format_tag, sampwidth):
+        # Les flottants ne peuvent porter le message que dans leur mantisse
+        if format_tag == WAVE_FORMAT_IEEE_FLOAT:
+            return FLOAT_MANTISSA_BITS
+        return sampwidth * 8
+
+    @staticmethod
+    def _validate_channels(channels, nchannels):
+        if channels is None:
+            return list(range(nchannels))
+
+        channels = sorted(set(channels))
+        if not channels or channels[0] < 0 or channels[-1] >= nchannels:
+            raise ValueError(f"Canaux invalides: {channels}. Le fichier contient {nchannels} canaux")
+        return channels
+
+    @staticmethod
+    def _read_wav_format(f):
+        riff, _, wave_id = struct.unpack('<4sI4s', f.read(12))
+        if riff != b'RIFF' or wave_id != b'WAVE':
+            raise ValueError("Le fichier n'est pas un fichier WAV valide")
+
+        wav_format = None
+        while True:
+            chunk_header = f.read(8)
+            if len(chunk_header) < 8:
+                raise ValueError("Bloc 'data' introuvable dans le fichier WAV")
+            chunk_id, chunk_size = struct.unpack('<4sI', chunk_header)
+
+            if chunk_id == b'fmt ':
+                body = f.read(chunk_size + (chunk_size & 1))
+                format_tag, nchannels, framerate, _, block_align, bits = struct.unpack_from('<HHIIHH', body)
+                if format_tag == WAVE_FORMAT_EXTENSIBLE and chunk_size >= 40:
+                    # Les 2 premiers octets du GUID de sous-format donnent le vrai format
+                    (format_tag,) = struct.unpack_from('<H', body, 24)
+                wav_format = {
+                    'format_tag': format_tag,
+                    'nchannels': nchannels,
+                    'sampwidth': (bits + 7) // 8,
+                    'framerate': framerate,
+                    'block_align': block_align,
+                }
+            elif chunk_id == b'data':
+                if wav_format is None:
+                    raise ValueError("Bloc 'fmt ' manquant avant les données WAV")
+                break
+            else:
+                f.seek(chunk_size + (chunk_size & 1), 1)
+
+        sampwidth = wav_format['sampwidth']
+        if wav_format['format_tag'] == WAVE_FORMAT_PCM and sampwidth not in (1, 2, 3, 4):
+            raise ValueError("Seuls les fichiers PCM 8, 16, 24 ou 32 bits sont supportés")
+        if wav_format['format_tag'] == WAVE_FORMAT_IEEE_FLOAT and sampwidth != 4:
+            raise ValueError("Seuls les fichiers flottants 32 bits sont supportés")
+        if wav_format['format_tag'] not in (WAVE_FORMAT_PCM, WAVE_FORMAT_IEEE_FLOAT):
+            raise ValueError(f"Format WAV non supporté: {wav_format['format_tag']:#06x}")
+        if wav_format['block_align'] != sampwidth * wav_format['nchannels']:
+            raise ValueError("Alignement des échantillons WAV non supporté")
+
+        # Taille du bloc bornée par la taille réelle du fichier (en-têtes de flux incomplets)
+        data_offset = f.tell()
+        file_size = f.seek(0, os.SEEK_END)
+        data_size = min(chunk_size, file_size - data_offset)
+        wav_format['data_offset'] = data_offset
+        wav_format['nframes'] = data_size // wav_format['block_align']
+        return wav_format
+
+    def _byte_plane(self, channel, byte_index):
+        # Vue à pas fixe sur l'octet byte_index de chaque échantillon du canal, sans copie
+        key = (channel, byte_index)
+        if key not in self._planes:
+            self._planes[key] = self.frames[channel * self.sampwidth + byte_index::self.block_align]
+        return self._planes[key]
+
+    def _sample_planes(self, shift):
+        max_shift = self._max_shift(self.format_tag, self.sampwidth)
+        if not 0 <= shift < max_shift:
+            raise ValueError(f"Shift invalide: {shift}. Valeurs autorisées: 0 à {max_shift - 1}")
+        return [self._byte_plane(channel, shift // 8) for channel in self.channels]
+
+    def _get_bit(self, planes, sample_idx, shift):
+        # Les échantillons des canaux choisis sont entrelacés dans l'espace des positions
+        plane = planes[sample_idx % len(planes)]
+        return (plane[sample_idx // len(planes)] >> (shift % 8)) & 1
+
+    def _set_bit(self, planes, sample_idx, shift, bit):
+        plane = planes[sample_idx % len(planes)]
+        frame = sample_idx // len(planes)
+        plane[frame] = (plane[frame] & ~(1 << (shift % 8))) | (bit << (shift % 8))
+
+    def _channel_histogram(self, channel):
+        # Lecture vectorisée des valeurs d'un canal (flottants lus comme entiers 32 bits)
+        if self.sampwidth == 3:
+            # 24 bits compactés -> 32 bits : l'octet de poids faible reste nul, valeur décalée de 8 bits
+            padded = bytearray(self.nframes * 4)
+            for byte_index in range(3):
+                padded[byte_index + 1::4] = self._byte_plane(channel, byte_index)
+            histogram = Counter(self._native_array('i', padded))
+            return Counter({value >> 8: count for value, count in histogram.items()})
+
+        typecode = {1: 'B', 2: 'h', 4: 'i'}[self.sampwidth]
+        if self.sampwidth == 1 or sys.byteorder == 'little':
+            return Counter(self.frames.cast(typecode)[channel::self.nchannels])
+        return Counter(self._native_array(typecode, self.frames)[channel::self.nchannels])
+
+    @staticmethod
+    def _native_array(typecode, data):
+        samples = array(typecode)
+        samples.frombytes(data)
+        if sys.byteorder == 'big':
+            samples.byteswap()
+        return samples
+
+    def hide_binary_file(self, txt_path, output_audio_path, positions_file=None, shift=0, compression=None):
         binary_str = self._read_and_validate_binary_file(txt_path)
         padding = (8 - len(binary_str) % 8) % 8  # Calcul du padding
         byte_data = self._bits_to_bytes(binary_str)
+        codec_id, byte_data = compress_payload(byte_data, compression)
+
+        max_bytes = self._capacity(self.total_samples)['random']
+        if len(byte_data) > max_bytes:
+            raise ValueError(f"Capacité insuffisante. Max: {max_bytes} octets, Reçu: {len(byte_data)} octets")
 
         # Générer 1 position de départ par octet (chaque octet utilise 8 échantillons)
         self._load_or_generate_positions(positions_file, len(byte_data))
@@ -51,37 +216,53 @@ class AudioSteganography:
                 f"Capacité insuffisante. Max: {len(self.byte_positions)} octets, Reçu: {len(byte_data)} octets")
 
         # Stocker le padding dans les métadonnées
-        self._store_metadata(len(byte_data), shift, padding)  # <-- Modification ici
+        self._store_metadata(len(byte_data), shift, padding, codec_id, payload_checksum(byte_data))
 
+        planes = self._sample_planes(shift)
         for i, byte in enumerate(byte_data):
             sample_idx = self.byte_positions[i]
             # Stocker les 8 bits de l'octet dans 8 échantillons consécutifs
             for bit_pos in range(8):
-                if sample_idx + bit_pos >= len(self.samples):
+                if sample_idx + bit_pos >= self.total_samples:
                     continue
                 bit = (byte >> (7 - bit_pos)) & 1  # Extraire le bit (MSB en premier)
-                self.samples[sample_idx + bit_pos] = (self.samples[sample_idx + bit_pos] & ~(1 << shift)) | (
-                            bit << shift)
+                self._set_bit(planes, sample_idx + bit_pos, shift, bit)
 
         self._save_audio(output_audio_path)
 
     def retrieve_binary_file(self, output_txt_path=None, positions_file=None):
-        length, shift, padding = self._extract_metadata()  # <-- Récupérer le padding
-        self._load_or_generate_positions(positions_file, length)
+        length, shift, padding, codec_id, checksum, version = self._extract_metadata()
+        if version == LEGACY_VERSION:
+            max_bytes = max(self.total_samples - 7, 0)
+        else:
+            max_bytes = self._capacity(self.total_samples)['random']
+        if length > max_bytes:
+            raise ValueError(f"En-tête incohérent : longueur {length} supérieure à la capacité du porteur")
 
+        if version == LEGACY_VERSION:
+            self._load_legacy_positions(positions_file, length)
+        else:
+            self._load_or_generate_positions(positions_file, length)
+
+        planes = self._sample_planes(shift)
         extracted_bytes = bytearray()
         for i in range(length):
             sample_idx = self.byte_positions[i]
             byte = 0
             for bit_pos in range(8):
-                if sample_idx + bit_pos >= len(self.samples):
+                if sample_idx + bit_pos >= self.total_samples:
                     continue
-                bit = (self.samples[sample_idx + bit_pos] >> shift) & 1
+                bit = self._get_bit(planes, sample_idx + bit_pos, shift)
                 byte = (byte << 1) | bit
             extracted_bytes.append(byte)
 
+        # Vérification avant la décompression et le décodage Huffman (pas de CRC en version 0)
+        if checksum is not None and payload_checksum(extracted_bytes) != checksum:
+            raise ValueError("Somme de contrôle invalide : fichier de positions incorrect ou porteur altéré")
+
+        extracted_bytes = decompress_payload(codec_id, bytes(extracted_bytes))
         binary_str = ''.join(format(byte, '08b') for byte in extracted_bytes)
-        binary_str = binary_str[:length * 8 - padding]  # <-- Supprimer le padding
+        binary_str = binary_str[:len(binary_str) - padding]  # <-- Supprimer le padding
 
         if output_txt_path:
             self._save_binary_text(binary_str, output_txt_path)
@@ -98,8 +279,36 @@ class AudioSteganography:
         # Si pas assez de positions, compléter avec des positions aléatoires
         if len(self.byte_positions) < required_length:
             random.seed(42)  # Seed fixe pour la reproductibilité
+            # Créneaux de 8 échantillons sans recouvrement après l'en-tête : deux octets ne
+            # peuvent pas partager d'échantillon
+            max_slot = (self.total_samples - self.metadata_samples) // 8 - 1
+            used_slots = {
+                (sample - self.metadata_samples) // 8
+                for pos in self.byte_positions for sample in (pos, pos + 7)
+                if self.metadata_samples <= sample < self.metadata_samples + 8 * (max_slot + 1)
+            }
+
+            if required_length - len(self.byte_positions) > max_slot + 1 - len(used_slots):
+                raise ValueError("Capacité insuffisante pour compléter le fichier de positions")
+
+            while len(self.byte_positions) < required_length:
+                slot = random.randint(0, max_slot)
+                if slot not in used_slots:
+                    self.byte_positions.append(self.metadata_samples + 8 * slot)
+                    used_slots.add(slot)
+
+    def _load_legacy_positions(self, positions_file, required_length):
+        # Tirage des porteurs de version 0 : positions de départ quelconques, en-tête compris
+        self.byte_positions = []
+
+        if positions_file and os.path.exists(positions_file):
+            with open(positions_file, 'r') as f:
+                self.byte_positions = [int(line.strip()) for line in f if line.strip()]
+
+        if len(self.byte_positions) < required_length:
+            random.seed(42)
             existing_positions = set(self.byte_positions)
-            max_pos = len(self.samples) - 8  # On a besoin de 8 échantillons consécutifs par byte
+            max_pos = self.total_samples - 8
 
             while len(self.byte_positions) < required_length:
                 pos = random.randint(0, max_pos)
@@ -107,27 +316,17 @@ class AudioSteganography:
                     self.byte_positions.append(pos)
                     existing_positions.add(pos)
 
-    def _store_metadata(self, length, shift, padding):
-        metadata = (length & 0xFFFF) | ((shift & 0xFF) << 16) | ((padding & 0x7) << 24)  # 3 bits pour le padding
-        metadata_bits = format(metadata, '032b')
+    def _store_metadata(self, length, shift, padding, codec_id, checksum):
+        header_bits = pack_header(length, shift, padding, codec_id, checksum)
 
+        planes = self._sample_planes(0)
         for i in range(self.metadata_samples):
-            if i < 32:
-                self.samples[i] = (self.samples[i] & ~1) | int(metadata_bits[i])
+            self._set_bit(planes, i, 0, int(header_bits[i]))
 
     def _extract_metadata(self):
-        metadata_bits = []
-        for i in range(self.metadata_samples):
-            if i < 32:
-                metadata_bits.append(str(self.samples[i] & 1))
-
-        metadata = int(''.join(metadata_bits), 2)
-        length = metadata & 0xFFFF
-        shift = (metadata >> 16) & 0xFF
-        padding = (metadata >> 24) & 0x7  # Récupérer le padding
-        return length, shift, padding
-
-        return length, shift
+        planes = self._sample_planes(0)
+        header_bits = ''.join(str(self._get_bit(planes, i, 0)) for i in range(self.metadata_samples))
+        return unpack_header(header_bits)
 
     def _read_and_validate_binary_file(self, txt_path):
         if not os.path.exists(txt_path):
@@ -155,20 +354,9 @@ class AudioSteganography:
                 f.write(binary_str[i:i + 4] + '\n')
 
     def _save_audio(self, output_audio_path):
-        total_samples = len(self.samples)
-        if self.sampwidth == 1:
-            fmt = f"{total_samples}B"
-        elif self.sampwidth == 2:
-            fmt = f"<{total_samples}h"
-        data = struct.pack(fmt, *self.samples)
-
-        wave_write = wave.open(output_audio_path, 'wb')
-        wave_write.setnchannels(self.nchannels)
-        wave_write.setsampwidth(self.sampwidth)
-        wave_write.setframerate(self.framerate)
-        wave_write.setcomptype(self.comptype, self.compname)
-        wave_write.writeframes(data)
-        wave_write.close()
+        # Les en-têtes et blocs annexes sont recopiés tels quels, sans réencodage
+        with open(output_audio_path, 'wb') as f:
+            f.write(self.raw)
 
 # Exemple d'utilisation:
 # audio_stego = AudioSteganography("input.wav")
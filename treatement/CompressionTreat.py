@@ -0,0 +1,108 @@
+import bz2
+import lzma
+import zlib
+from collections import Counter
+
+from treatement.HuffmanTreat import Huffman
+
+# L'identifiant du codec est stocké sur 3 bits dans les métadonnées du porteur
+MAX_CODEC_ID = 7
+SAMPLE_SIZE = 4096
+
+_LZMA_FILTERS = [{'id': lzma.FILTER_LZMA2, 'preset': 9}]
+
+CODECS = {}
+
+
+def register_codec(codec_id, name, compress, decompress):
+    if not 0 <= codec_id <= MAX_CODEC_ID:
+        raise ValueError(f"Identifiant de codec invalide: {codec_id}. Valeurs autorisées: 0 à {MAX_CODEC_ID}")
+    if codec_id in CODECS:
+        raise ValueError(f"Identifiant de codec déjà utilisé: {codec_id}")
+    CODECS[codec_id] = (name, compress, decompress)
+
+
+def codec_id_from_name(name):
+    for codec_id, (codec_name, _, _) in CODECS.items():
+        if codec_name == name:
+            return codec_id
+    raise ValueError(f"Codec inconnu: {name}")
+
+
+def compress_payload(data, compression=None):
+    if compression is None:
+        return 0, data
+
+    if compression == 'auto':
+        # Choix du codec sur un échantillon, puis compression complète avec le gagnant
+        sample = data[:SAMPLE_SIZE]
+        codec_id = min(CODECS, key=lambda cid: (len(CODECS[cid][1](sample)), cid))
+    else:
+        codec_id = codec_id_from_name(compression)
+
+    compressed = CODECS[codec_id][1](data)
+    if compression == 'auto' and len(compressed) >= len(data):
+        return 0, data
+    return codec_id, compressed
+
+
+def decompress_payload(codec_id, data):
+    if codec_id not in CODECS:
+        raise ValueError(f"Codec inconnu dans les métadonnées: {codec_id}")
+    return CODECS[codec_id][2](data)
+
+
+def _huffman_compress(data):
+    # Longueurs des codes canoniques (nombre de symboles - 1, puis paires (symbole, longueur)
+    # ou 256 longueurs si plus court), padding, puis bits codés
+    if not data:
+        return b''
+
+    code_lengths = Huffman.from_frequencies(Counter(data)).get_code_lengths()
+    huffman = Huffman.from_code_lengths(code_lengths)
+
+    if 2 * len(code_lengths) < 256:
+        table = b''.join(bytes([symbol, code_lengths[symbol]]) for symbol in sorted(code_lengths))
+    else:
+        table = bytes(code_lengths.get(symbol, 0) for symbol in range(256))
+
+    return bytes([len(code_lengths) - 1]) + table + _pack_bits(huffman.encode(data))
+
+
+def _huffman_decompress(data):
+    if not data:
+        return b''
+
+    count = data[0] + 1
+    if 2 * count < 256:
+        code_lengths = {data[1 + 2 * i]: data[2 + 2 * i] for i in range(count)}
+        offset = 1 + 2 * count
+    else:
+        code_lengths = {symbol: length for symbol, length in enumerate(data[1:257]) if length}
+        offset = 257
+
+    bits = _unpack_bits(data[offset:])
+    return bytes(Huffman.from_code_lengths(code_lengths).decode_symbols(bits))
+
+
+def _pack_bits(bits):
+    padding = (8 - len(bits) % 8) % 8
+    bits += '0' * padding
+    body = int(bits, 2).to_bytes(len(bits) // 8, 'big') if bits else b''
+    return bytes([padding]) + body
+
+
+def _unpack_bits(data):
+    padding = data[0]
+    body = data[1:]
+    bits = format(int.from_bytes(body, 'big'), f'0{len(body) * 8}b') if body else ''
+    return bits[:len(bits) - padding]
+
+
+register_codec(0, 'none', bytes, bytes)
+register_codec(1, 'zlib', lambda data: zlib.compress(data, 9), zlib.decompress)
+register_codec(2, 'lzma',
+               lambda data: lzma.compress(data, format=lzma.FORMAT_RAW, filters=_LZMA_FILTERS),
+               lambda data: lzma.decompress(data, format=lzma.FORMAT_RAW, filters=_LZMA_FILTERS))
+register_codec(3, 'bz2', lambda data: bz2.compress(data, 9), bz2.decompress)
+register_codec(4, 'huffman', _huffman_compress, _huffman_decompress)
@@ -0,0 +1,55 @@
+import zlib
+
+# En-tête stocké dans les LSB du porteur :
+#   mot 0 : signature (16 bits) | version (8 bits) | réservé (8 bits)
+#   mot 1 : longueur (16 bits) | shift (8 bits) | padding (3 bits) | codec (3 bits)
+#   mot 2 : CRC32 de la charge utile stockée
+#
+# Version 0 (porteurs antérieurs) : le mot 1 seul, sans signature ni CRC, dans les 32 premiers LSB
+MAGIC = 0x5347  # 'SG'
+VERSION = 1
+LEGACY_VERSION = 0
+HEADER_BITS = 96
+
+
+def payload_checksum(data):
+    return zlib.crc32(data) & 0xFFFFFFFF
+
+
+def pack_header(length, shift, padding, codec_id, checksum):
+    signature = (MAGIC << 16) | (VERSION << 8)
+    metadata = (length & 0xFFFF) | ((shift & 0xFF) << 16) | ((padding & 0x7) << 24) | ((codec_id & 0x7) << 27)
+    return ''.join(format(word, '032b') for word in (signature, metadata, checksum & 0xFFFFFFFF))
+
+
+def unpack_header(header_bits):
+    # Sans signature, l'en-tête est lu comme un mot de métadonnées de version 0
+    if int(header_bits[:16], 2) != MAGIC:
+        return _unpack_legacy_header(header_bits[:32])
+
+    version = int(header_bits[16:24], 2)
+    if version != VERSION:
+        raise ValueError(f"Version d'en-tête non supportée: {version}")
+
+    length, shift, padding, codec_id = _unpack_metadata(int(header_bits[32:64], 2))
+    checksum = int(header_bits[64:96], 2)
+    return length, shift, padding, codec_id, checksum, version
+
+
+def _unpack_legacy_header(header_bits):
+    metadata = int(header_bits, 2)
+    # Les porteurs de version 0 n'ont jamais écrit de codec ni les bits de poids fort : sinon ce
+    # n'est pas un porteur
+    if metadata >> 27:
+        raise ValueError("Signature absente : ce porteur ne contient pas de message reconnu")
+
+    length, shift, padding, codec_id = _unpack_metadata(metadata)
+    return length, shift, padding, codec_id, None, LEGACY_VERSION
+
+
+def _unpack_metadata(metadata):
+    length = metadata & 0xFFFF
+    shift = (metadata >> 16) & 0xFF
+    padding = (metadata >> 24) & 0x7
+    codec_id = (metadata >> 27) & 0x7
+    return length, shift, padding, codec_id
@@ -28,6 +28,35 @@ class Huffman:
             self._generate_codes()
             self._build_reverse_codes()
 
+    @classmethod
+    def from_frequencies(cls, frequencies):
+        huffman = cls()
+        # Insertion triée : l'arbre (et donc les codes) est reproductible au décodage
+        for char in sorted(frequencies):
+            huffman.frequencies[char] = frequencies[char]
+        huffman._build_heap()
+        huffman._build_tree()
+        huffman._generate_codes()
+        huffman._build_reverse_codes()
+        return huffman
+
+    @classmethod
+    def from_code_lengths(cls, code_lengths):
+        # Codes canoniques : seules les longueurs sont nécessaires pour reconstruire l'arbre
+        huffman = cls()
+        code = 0
+        previous_length = 0
+        for char, length in sorted(code_lengths.items(), key=lambda item: (item[1], item[0])):
+            code <<= length - previous_length
+            huffman.codes[char] = format(code, f'0{length}b')
+            code += 1
+            previous_length = length
+        huffman._build_reverse_codes()
+        return huffman
+
+    def get_code_lengths(self):
+        return {char: len(code) for char, code in self.codes.items()}
+
     def _build_frequencies(self):
         with open(self.file_path, 'r', encoding='utf-8') as file:
             text = file.read()
@@ -74,23 +103,29 @@ class Huffman:
     def _build_reverse_codes(self):
         self.reverse_codes = {v: k for k, v in self.codes.items()}
 
+    def encode(self, symbols):
+        return ''.join(self.codes[symbol] for symbol in symbols)
+
     def decode_bits(self, bit_string):
+        return ''.join(self.decode_symbols(bit_string))
+
+    def decode_symbols(self, bit_string):
         if not hasattr(self, 'reverse_codes'):
             raise ValueError("Le dictionnaire Huffman n'a pas été initialisé")
 
         current_code = ""
-        decoded_text = []
+        decoded_symbols = []
 
         for bit in bit_string:
             current_code += bit
             if current_code in self.reverse_codes:
-                decoded_text.append(self.reverse_codes[current_code])
+                decoded_symbols.append(self.reverse_codes[current_code])
                 current_code = ""
 
         if current_code:
             raise ValueError("Bits résiduels non décodables trouvés")
 
-        return ''.join(decoded_text)
+        return decoded_symbols
 
     def decode_bytes(self, byte_data):
         bit_string = ''.join(format(byte, '08b') for byte in byte_data)
@@ -3,8 +3,16 @@ import random
 import math
 import os
 
+from treatement.AnalysisTreat import lsb_chi_square
+from treatement.CompressionTreat import compress_payload, decompress_payload
+from treatement.HeaderTreat import HEADER_BITS, LEGACY_VERSION, pack_header, payload_checksum, unpack_header
+
 
 class ImageSteganography:
+    max_payload = 0xFFFF  # La longueur est stockée sur 16 bits
+    seed_storage_pixels = HEADER_BITS // 3  # 3 bits d'en-tête par pixel
+    header_only_analysis = True  # analyze() sans statistiques ne décode pas les pixels
+
     def __init__(self, image_path):
         if not os.path.exists(image_path):
             raise FileNotFoundError(f"Le fichier image {image_path} n'existe pas")
@@ -18,13 +26,46 @@ class ImageSteganography:
         self.pixels = list(self.image.getdata())
         self.width = self.image.width
         self.height = self.image.height
-        self.seed_storage_pixels = 11
         self.byte_positions = []
 
-    def hide_binary_file(self, txt_path, output_img_path, positions_file=None, shift=0):
+    @classmethod
+    def analyze(cls, image_path, statistics=False):
+        if not os.path.exists(image_path):
+            raise FileNotFoundError(f"Le fichier image {image_path} n'existe pas")
+
+        # Image.open ne lit que l'en-tête : les pixels ne sont décodés que pour les statistiques
+        with Image.open(image_path) as image:
+            width, height = image.size
+            report = {
+                'width': width,
+                'height': height,
+                'bit_depth': 8,
+                'capacity': {shift: cls._capacity(width * height) for shift in range(8)},
+            }
+
+            if statistics:
+                histogram = (image if image.mode == 'RGB' else image.convert('RGB')).histogram()
+                report['statistics'] = {
+                    channel: lsb_chi_square(dict(enumerate(histogram[channel * 256:(channel + 1) * 256])))
+                    for channel in range(3)
+                }
+
+        return report
+
+    @classmethod
+    def _capacity(cls, total_pixels):
+        # 8 positions (canal d'un pixel) distinctes par octet
+        return {'random': min(max(total_pixels * 3 - HEADER_BITS, 0) // 8, cls.max_payload)}
+
+    def hide_binary_file(self, txt_path, output_img_path, positions_file=None, shift=0, compression=None):
         binary_str = self._read_and_validate_binary_file(txt_path)
         padding = (8 - len(binary_str) % 8) % 8
         byte_data = self._bits_to_bytes(binary_str)
+        codec_id, byte_data = compress_payload(byte_data, compression)
+
+        max_bytes = self._capacity(len(self.pixels))['random']
+        if len(byte_data) > max_bytes:
+            raise ValueError(f"Capacité insuffisante. Max: {max_bytes} bytes, Reçu: {len(byte_data)} bytes")
 
         # Charger 8 positions par octet
         self._load_or_generate_positions(positions_file, 8 * len(byte_data))  # <-- Modification ici
@@ -38,7 +79,7 @@ class ImageSteganography:
             raise ValueError(
                 f"Capacité insuffisante. Max: {len(self.byte_positions) // 8} bytes, Reçu: {len(byte_data)} bytes")
 
-        self._store_metadata(len(byte_data), shift, padding)
+        self._store_metadata(len(byte_data), shift, padding, codec_id, payload_checksum(byte_data))
 
         new_pixels = list(self.pixels)
         for i, byte in enumerate(byte_data):
@@ -72,10 +113,17 @@ class ImageSteganography:
         self._save_image(new_pixels, output_img_path)
 
     def retrieve_binary_file(self, output_txt_path=None, positions_file=None):
-        length, shift, padding = self._extract_metadata()
-
-        # Charger 8 positions par octet
-        self._load_or_generate_positions(positions_file, 8 * length)  # <-- Modification ici
+        length, shift, padding, codec_id, checksum, version = self._extract_metadata()
+        if version == LEGACY_VERSION:
+            max_bytes = len(self.pixels) * 3 // 8
+        else:
+            max_bytes = self._capacity(len(self.pixels))['random']
+        if length > max_bytes:
+            raise ValueError(f"En-tête incohérent : longueur {length} supérieure à la capacité du porteur")
+
+        # Charger 8 positions par octet (les porteurs de version 0 tiraient aussi dans l'en-tête)
+        first_pos = 0 if version == LEGACY_VERSION else HEADER_BITS
+        self._load_or_generate_positions(positions_file, 8 * length, first_pos)
 
         extracted_bytes = bytearray()
         for i in range(length):
@@ -104,15 +152,20 @@ class ImageSteganography:
 
             extracted_bytes.append(byte)
 
+        # Vérification avant la décompression et le décodage Huffman (pas de CRC en version 0)
+        if checksum is not None and payload_checksum(extracted_bytes) != checksum:
+            raise ValueError("Somme de contrôle invalide : fichier de positions incorrect ou porteur altéré")
+
+        extracted_bytes = decompress_payload(codec_id, bytes(extracted_bytes))
         binary_str = ''.join(format(byte, '08b') for byte in extracted_bytes)
-        binary_str = binary_str[:length * 8 - padding]
+        binary_str = binary_str[:len(binary_str) - padding]
 
         if output_txt_path:
             self._save_binary_text(binary_str, output_txt_path)
 
         return binary_str
 
-    def _load_or_generate_positions(self, positions_file, required_length):
+    def _load_or_generate_positions(self, positions_file, required_length, first_pos=HEADER_BITS):
         self.byte_positions = []
 
         if positions_file and os.path.exists(positions_file):
@@ -127,36 +180,22 @@ class ImageSteganography:
             additional_positions = []
 
             while len(additional_positions) < (required_length - len(self.byte_positions)):
-                pos = random.randint(0, max_pos)
+                pos = random.randint(first_pos, max_pos)  # Ne pas écraser l'en-tête
                 if pos not in existing_positions:
                     additional_positions.append(pos)
                     existing_positions.add(pos)
 
             self.byte_positions.extend(additional_positions)
 
-    def _store_metadata(self, length, shift, padding):
-        metadata = (length & 0xFFFF) | ((shift & 0xFF) << 16) | ((padding & 0x7) << 24)
-        metadata_bits = format(metadata, '032b')
+    def _store_metadata(self, length, shift, padding, codec_id, checksum):
+        header_bits = pack_header(length, shift, padding, codec_id, checksum)
 
         new_pixels = list(self.pixels)
-        bit_idx = 0
-
         for i in range(self.seed_storage_pixels):
-            if bit_idx >= 32:
-                break
-
             r, g, b = new_pixels[i]
-
-            if bit_idx < 32:
-                r = (r & 0xFE) | int(metadata_bits[bit_idx])
-                bit_idx += 1
-            if bit_idx < 32:
-                g = (g & 0xFE) | int(metadata_bits[bit_idx])
-                bit_idx += 1
-            if bit_idx < 32:
-                b = (b & 0xFE) | int(metadata_bits[bit_idx])
-                bit_idx += 1
-
+            r = (r & 0xFE) | int(header_bits[3 * i])
+            g = (g & 0xFE) | int(header_bits[3 * i + 1])
+            b = (b & 0xFE) | int(header_bits[3 * i + 2])
             new_pixels[i] = (r, g, b)
 
         self.pixels = new_pixels
@@ -168,11 +207,7 @@ class ImageSteganography:
             r, g, b = self.pixels[i]
             metadata_bits.extend([str(r & 1), str(g & 1), str(b & 1)])
 
-        metadata = int(''.join(metadata_bits[:32]), 2)
-        length = metadata & 0xFFFF
-        shift = (metadata >> 16) & 0xFF
-        padding = (metadata >> 24) & 0x7  # Récupérer le padding
-        return length, shift, padding
+        return unpack_header(''.join(metadata_bits))
 
     def _read_and_validate_binary_file(self, txt_path):
         if not os.path.exists(txt_path):
@@ -0,0 +1,413 @@
+import math
+import os
+import random
+import struct
+from array import array
+from collections import Counter
+
+from treatement.AnalysisTreat import lsb_chi_square
+from treatement.CompressionTreat import compress_payload, decompress_payload
+from treatement.HeaderTreat import HEADER_BITS, LEGACY_VERSION, pack_header, payload_checksum, unpack_header
+
+# Marqueurs SOF à codage de Huffman séquentiel (baseline et étendu)
+SEQUENTIAL_SOF = (0xC0, 0xC1)
+UNSUPPORTED_SOF = (0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF)
+
+
+class JpegSteganography:
+    max_payload = 0xFFFF  # La longueur est stockée sur 16 bits
+    header_only_analysis = False  # La capacité exige le décodage entropique des scans
+
+    # Les bits sont cachés dans le LSB de l'amplitude des coefficients AC quantifiés avec |v| >= 2.
+    # Ce bit est le dernier des bits additionnels du coefficient dans le flux entropique : on le
+    # modifie directement, la catégorie (run, size) et donc le code de Huffman restent identiques,
+    # sans décodage IDCT ni réencodage de l'image.
+    def __init__(self, image_path):
+        if not os.path.exists(image_path):
+            raise FileNotFoundError(f"Le fichier image {image_path} n'existe pas")
+
+        self.image_path = image_path
+        with open(image_path, 'rb') as f:
+            data = f.read()
+
+        self.width = 0
+        self.height = 0
+        self.components = {}
+        self.huffman_tables = {}
+        self.restart_interval = 0
+
+        # Le fichier est découpé en morceaux bruts (bytes) et en segments entropiques déstuffés
+        # (indices dans self.segments), recollés tels quels à l'écriture
+        self.pieces = []
+        self.segments = []
+        self.coefficient_segments = array('I')
+        self.coefficient_offsets = array('Q')
+        self.coefficient_signs = bytearray()
+        self.amplitudes = array('i')  # Valeur signée de chaque coefficient utilisable
+
+        self._parse(data)
+        self.byte_positions = []
+
+    @classmethod
+    def analyze(cls, image_path, statistics=False):
+        # Les coefficients sont localisés par décodage entropique seul, sans IDCT
+        stego = cls(image_path)
+        report = {
+            'width': stego.width,
+            'height': stego.height,
+            'coefficients': len(stego.coefficient_signs),
+            'capacity': {0: cls._capacity(len(stego.coefficient_signs))},
+        }
+
+        if statistics:
+            report['statistics'] = {
+                sign: lsb_chi_square(histogram) for sign, histogram in stego.magnitude_histograms().items()
+            }
+
+        return report
+
+    @classmethod
+    def _capacity(cls, total_coefficients):
+        # 8 coefficients distincts par octet
+        return {'random': min(max(total_coefficients - HEADER_BITS, 0) // 8, cls.max_payload)}
+
+    def hide_binary_file(self, txt_path, output_img_path, positions_file=None, compression=None):
+        binary_str = self._read_and_validate_binary_file(txt_path)
+        padding = (8 - len(binary_str) % 8) % 8
+        byte_data = self._bits_to_bytes(binary_str)
+        codec_id, byte_data = compress_payload(byte_data, compression)
+
+        if len(self.coefficient_signs) < HEADER_BITS:
+            raise ValueError(f"Capacité insuffisante. {len(self.coefficient_signs)} coefficients utilisables, "
+                             f"{HEADER_BITS} requis pour l'en-tête")
+
+        max_bytes = self._capacity(len(self.coefficient_signs))['random']
+        if len(byte_data) > max_bytes:
+            raise ValueError(f"Capacité insuffisante. Max: {max_bytes} bytes, Reçu: {len(byte_data)} bytes")
+
+        # Charger 8 positions par octet
+        self._load_or_generate_positions(positions_file, 8 * len(byte_data))
+
+        if positions_file is not None:
+            with open(positions_file, 'w') as f:
+                for pos in self.byte_positions:
+                    f.write(f"{pos}\n")
+
+        self._store_metadata(len(byte_data), padding, codec_id, payload_checksum(byte_data))
+
+        for i, byte in enumerate(byte_data):
+            for bit_pos in range(8):
+                # Extraire le bit (du MSB au LSB)
+                bit = (byte >> (7 - bit_pos)) & 1
+                self._set_bit(self.byte_positions[i * 8 + bit_pos], bit)
+
+        self._save_image(output_img_path)
+
+    def retrieve_binary_file(self, output_txt_path=None, positions_file=None):
+        length, _, padding, codec_id, checksum, version = self._extract_metadata()
+        # Le moteur JPEG n'a jamais écrit d'en-tête de version 0
+        if version == LEGACY_VERSION:
+            raise ValueError("Signature absente : ce porteur ne contient pas de message reconnu")
+        if length > self._capacity(len(self.coefficient_signs))['random']:
+            raise ValueError(f"En-tête incohérent : longueur {length} supérieure à la capacité du porteur")
+
+        # Charger 8 positions par octet
+        self._load_or_generate_positions(positions_file, 8 * length)
+
+        extracted_bytes = bytearray()
+        for i in range(length):
+            byte = 0
+            for bit_pos in range(8):
+                byte = (byte << 1) | self._get_bit(self.byte_positions[i * 8 + bit_pos])
+            extracted_bytes.append(byte)
+
+        # Vérification avant la décompression et le décodage Huffman
+        if payload_checksum(extracted_bytes) != checksum:
+            raise ValueError("Somme de contrôle invalide : fichier de positions incorrect ou porteur altéré")
+
+        extracted_bytes = decompress_payload(codec_id, bytes(extracted_bytes))
+        binary_str = ''.join(format(byte, '08b') for byte in extracted_bytes)
+        binary_str = binary_str[:len(binary_str) - padding]
+
+        if output_txt_path:
+            self._save_binary_text(binary_str, output_txt_path)
+
+        return binary_str
+
+    def _parse(self, data):
+        if data[:2] != b'\xff\xd8':
+            raise ValueError("Le fichier n'est pas un fichier JPEG valide")
+
+        pos = 2
+        literal_start = 0
+        frame_seen = False
+        while True:
+            if pos >= len(data) or data[pos] != 0xFF:
+                raise ValueError("Structure JPEG invalide : marqueur attendu")
+            while pos + 1 < len(data) and data[pos + 1] == 0xFF:
+                pos += 1  # Octets de remplissage avant un marqueur
+            marker = data[pos + 1]
+            pos += 2
+
+            if marker == 0xD9:
+                break
+            if 0xD0 <= marker <= 0xD7 or marker == 0x01:
+                continue
+
+            (segment_length,) = struct.unpack_from('>H', data, pos)
+            body = data[pos + 2:pos + segment_length]
+            pos += segment_length
+
+            if marker in UNSUPPORTED_SOF:
+                raise ValueError("Seuls les JPEG séquentiels à codage de Huffman sont supportés")
+            if marker in SEQUENTIAL_SOF:
+                self._parse_frame(body)
+                frame_seen = True
+            elif marker == 0xC4:
+                self._parse_huffman_tables(body)
+            elif marker == 0xDD:
+                (self.restart_interval,) = struct.unpack_from('>H', body)
+            elif marker == 0xDA:
+                if not frame_seen:
+                    raise ValueError("Marqueur SOS rencontré avant l'en-tête de trame")
+                self.pieces.append(data[literal_start:pos])
+                pos = self._parse_scan(data, pos, body)
+                literal_start = pos
+
+        self.pieces.append(data[literal_start:])
+
+    def _parse_frame(self, body):
+        _, self.height, self.width, ncomponents = struct.unpack_from('>BHHB', body)
+        if self.height == 0:
+            raise ValueError("Hauteur JPEG définie par marqueur DNL non supportée")
+
+        for i in range(ncomponents):
+            component_id, sampling, _ = struct.unpack_from('>BBB', body, 6 + 3 * i)
+            self.components[component_id] = (sampling >> 4, sampling & 0x0F)
+
+    def _parse_huffman_tables(self, body):
+        offset = 0
+        while offset < len(body):
+            table_class_id = body[offset]
+            counts = body[offset + 1:offset + 17]
+            symbols = body[offset + 17:offset + 17 + sum(counts)]
+            offset += 17 + sum(counts)
+
+            # Table de correspondance indexée par les 16 prochains bits : (longueur << 8) | symbole,
+            # 0 pour un code absent de la table
+            table = [0] * 0x10000
+            code = 0
+            index = 0
+            for length, count in enumerate(counts, start=1):
+                span = 1 << (16 - length)
+                for _ in range(count):
+                    table[code * span:(code + 1) * span] = [(length << 8) | symbols[index]] * span
+                    code += 1
+                    index += 1
+                code <<= 1
+            self.huffman_tables[(table_class_id >> 4, table_class_id & 0x0F)] = table
+
+    def _parse_scan(self, data, pos, body):
+        scan_components = []
+        for i in range(body[0]):
+            component_id, selectors = body[1 + 2 * i], body[2 + 2 * i]
+            if component_id not in self.components:
+                raise ValueError(f"Composante inconnue dans le scan: {component_id}")
+            for table_key in ((0, selectors >> 4), (1, selectors & 0x0F)):
+                if table_key not in self.huffman_tables:
+                    raise ValueError(f"Table de Huffman {table_key[1]} non définie (DHT manquant) pour la "
+                                     f"composante {component_id}")
+            scan_components.append((component_id,
+                                    self.huffman_tables[(0, selectors >> 4)],
+                                    self.huffman_tables[(1, selectors & 0x0F)]))
+
+        blocks, total_mcus = self._mcu_layout(scan_components)
+        mcus_per_segment = self.restart_interval or total_mcus
+
+        # Découpage du flux entropique aux marqueurs RSTn
+        segment_start = pos
+        while True:
+            pos = data.find(b'\xff', pos)
+            if pos < 0 or pos + 1 >= len(data):
+                raise ValueError("Données JPEG tronquées")
+            marker = data[pos + 1]
+            if marker == 0x00:
+                pos += 2
+                continue
+
+            segment_mcus = min(mcus_per_segment, total_mcus)
+            self._add_segment(data[segment_start:pos], blocks, segment_mcus)
+            total_mcus -= segment_mcus
+
+            if 0xD0 <= marker <= 0xD7:
+                self.pieces.append(data[pos:pos + 2])
+                pos += 2
+                segment_start = pos
+                continue
+            return pos
+
+    def _mcu_layout(self, scan_components):
+        # Tables de Huffman de chaque bloc d'une MCU, et nombre de MCU du scan
+        max_h = max(h for h, _ in self.components.values())
+        max_v = max(v for _, v in self.components.values())
+
+        if len(scan_components) == 1:
+            # Scan non entrelacé : un seul bloc par MCU, sur la taille propre de la composante
+            component_id, dc_table, ac_table = scan_components[0]
+            h, v = self.components[component_id]
+            blocks_x = math.ceil(math.ceil(self.width * h / max_h) / 8)
+            blocks_y = math.ceil(math.ceil(self.height * v / max_v) / 8)
+            return [(dc_table, ac_table)], blocks_x * blocks_y
+
+        blocks = []
+        for component_id, dc_table, ac_table in scan_components:
+            h, v = self.components[component_id]
+            blocks.extend([(dc_table, ac_table)] * (h * v))
+        return blocks, math.ceil(self.width / (8 * max_h)) * math.ceil(self.height / (8 * max_v))
+
+    def _add_segment(self, raw_segment, blocks, mcu_count):
+        segment_index = len(self.segments)
+        segment = bytearray(raw_segment.replace(b'\xff\x00', b'\xff'))
+        self.segments.append(segment)
+        self.pieces.append(segment_index)
+
+        # Fenêtre de 24 bits commençant à chaque octet : les 16 prochains bits sont disponibles
+        # quel que soit le décalage dans l'octet
+        padded = bytes(segment) + b'\x00\x00\x00'
+        windows = [(a << 16) | (b << 8) | c for a, b, c in zip(padded, padded[1:], padded[2:])]
+        amplitudes = self.amplitudes
+        coefficient_segments = self.coefficient_segments
+        coefficient_offsets = self.coefficient_offsets
+        coefficient_signs = self.coefficient_signs
+        pos = 0
+        for _ in range(mcu_count):
+            for dc_table, ac_table in blocks:
+                entry = dc_table[(windows[pos >> 3] >> (8 - (pos & 7))) & 0xFFFF]
+                if not entry:
+                    raise ValueError("Code de Huffman invalide dans les données JPEG")
+                pos += (entry >> 8) + (entry & 0xFF)
+
+                k = 1
+                while k < 64:
+                    entry = ac_table[(windows[pos >> 3] >> (8 - (pos & 7))) & 0xFFFF]
+                    if not entry:
+                        raise ValueError("Code de Huffman invalide dans les données JPEG")
+                    pos += entry >> 8
+                    run, size = (entry >> 4) & 0x0F, entry & 0x0F
+                    if size == 0:
+                        if run != 15:
+                            break  # EOB
+                        k += 16
+                        continue
+                    k += run + 1
+
+                    if size >= 2:
+                        # Le premier bit additionnel donne le signe (1 : positif)
+                        window = (windows[pos >> 3] >> (8 - (pos & 7))) & 0xFFFF
+                        amplitude = window >> (16 - size)
+                        is_negative = not amplitude >> (size - 1)
+                        amplitudes.append(amplitude + 1 - (1 << size) if is_negative else amplitude)
+                        coefficient_segments.append(segment_index)
+                        coefficient_offsets.append(pos + size - 1)
+                        coefficient_signs.append(is_negative)
+                    pos += size
+
+        if pos > len(segment) * 8:
+            raise ValueError("Données JPEG tronquées")
+
+    def magnitude_histograms(self):
+        # Histogrammes des amplitudes par signe : l'insertion échange 2k et 2k+1 à signe constant
+        histogram = Counter(self.amplitudes)
+        return {
+            'positive': Counter({value: count for value, count in histogram.items() if value > 0}),
+            'negative': Counter({-value: count for value, count in histogram.items() if value < 0}),
+        }
+
+    def _get_bit(self, index):
+        segment = self.segments[self.coefficient_segments[index]]
+        offset = self.coefficient_offsets[index]
+        stream_bit = (segment[offset >> 3] >> (7 - (offset & 7))) & 1
+        # Pour un coefficient négatif, les bits additionnels sont le complément à un de l'amplitude
+        return stream_bit ^ self.coefficient_signs[index]
+
+    def _set_bit(self, index, bit):
+        segment = self.segments[self.coefficient_segments[index]]
+        offset = self.coefficient_offsets[index]
+        mask = 0x80 >> (offset & 7)
+        if (bit ^ self.coefficient_signs[index]) & 1:
+            segment[offset >> 3] |= mask
+        else:
+            segment[offset >> 3] &= ~mask
+
+    def _load_or_generate_positions(self, positions_file, required_length):
+        self.byte_positions = []
+
+        if positions_file and os.path.exists(positions_file):
+            with open(positions_file, 'r') as f:
+                self.byte_positions = [int(line.strip()) for line in f if line.strip()]
+
+        if any(not HEADER_BITS <= pos < len(self.coefficient_signs) for pos in self.byte_positions):
+            raise ValueError("Fichier de positions incompatible avec ce porteur")
+
+        # Si pas assez de positions, compléter avec des positions aléatoires
+        if len(self.byte_positions) < required_length:
+            random.seed(42)  # Seed fixe pour la reproductibilité
+            existing_positions = set(self.byte_positions)
+            max_pos = len(self.coefficient_signs) - 1
+
+            while len(self.byte_positions) < required_length:
+                pos = random.randint(HEADER_BITS, max_pos)  # Ne pas écraser l'en-tête
+                if pos not in existing_positions:
+                    self.byte_positions.append(pos)
+                    existing_positions.add(pos)
+
+    def _store_metadata(self, length, padding, codec_id, checksum):
+        header_bits = pack_header(length, 0, padding, codec_id, checksum)
+        for i in range(HEADER_BITS):
+            self._set_bit(i, int(header_bits[i]))
+
+    def _extract_metadata(self):
+        if len(self.coefficient_signs) < HEADER_BITS:
+            raise ValueError("Signature absente : ce porteur ne contient pas de message reconnu")
+        return unpack_header(''.join(str(self._get_bit(i)) for i in range(HEADER_BITS)))
+
+    def _read_and_validate_binary_file(self, txt_path):
+        if not os.path.exists(txt_path):
+            raise FileNotFoundError(f"Le fichier {txt_path} n'existe pas")
+
+        with open(txt_path, 'r') as f:
+            lines = [line.strip() for line in f.readlines() if line.strip()]
+
+        binary_str = []
+        for line in lines:
+            if not all(c in {'0', '1'} for c in line):
+                raise ValueError(f"Ligne invalide: {line}. Seuls 0 et 1 sont autorisés")
+            binary_str.append(line)
+
+        return ''.join(binary_str)
+
+    def _bits_to_bytes(self, binary_str):
+        padding = (8 - len(binary_str) % 8) % 8
+        padded_str = binary_str + '0' * padding
+        return bytes(int(padded_str[i:i + 8], 2) for i in range(0, len(padded_str), 8))
+
+    def _save_binary_text(self, binary_str, output_path):
+        with open(output_path, 'w') as f:
+            for i in range(0, len(binary_str), 4):
+                f.write(binary_str[i:i + 4] + '\n')
+
+    def _save_image(self, output_path):
+        # Seuls les segments entropiques sont ré-échappés (0xFF -> 0xFF00), le reste est recopié
+        with open(output_path, 'wb') as f:
+            for piece in self.pieces:
+                if isinstance(piece, int):
+                    f.write(self.segments[piece].replace(b'\xff', b'\xff\x00'))
+                else:
+                    f.write(piece)
+
+# Exemple d'utilisation:
+# stego = JpegSteganography("image.jpg")
+# stego.hide_binary_file("message.txt", "output.jpg", "positions.txt", compression='auto')
+#
+# stego = JpegSteganography("output.jpg")
+# recovered_bits = stego.retrieve_binary_file("recovered.txt", "positions.txt")